@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from typing import Dict
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
+
+import database as db
+from config import ADMIN_ID, WEBAPP_URL
+
+logger = logging.getLogger(__name__)
+
+# Лимит Telegram - около 30 сообщений в секунду, оставляем запас
+MESSAGES_PER_SECOND = 25
+
+# Сколько пользователей читаем из базы за раз; после каждой страницы прогресс сохраняется
+PAGE_SIZE = 100
+
+# Как часто (в секундах) обновлять сообщение с прогрессом у админа
+REPORT_INTERVAL = 10
+
+# Сколько раз повторять отправку после flood-ограничения
+MAX_RETRIES = 3
+
+# Запущенные рассылки: broadcast_id -> задача
+_tasks: Dict[int, asyncio.Task] = {}
+
+# Общие часы отправки: лимит Telegram глобальный для бота,
+# поэтому все одновременные рассылки делят один темп
+_next_send_at = 0.0
+
+async def throttle():
+    """Ждём своей очереди, чтобы суммарно не превысить лимит отправки"""
+    global _next_send_at
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+    send_at = max(now, _next_send_at)
+    _next_send_at = send_at + 1 / MESSAGES_PER_SECOND
+    if send_at > now:
+        await asyncio.sleep(send_at - now)
+
+def pause_sending(seconds: float):
+    """Приостановить все рассылки (после flood-ограничения)"""
+    global _next_send_at
+    loop = asyncio.get_running_loop()
+    _next_send_at = max(_next_send_at, loop.time() + seconds)
+
+CONTENT_TITLES = {
+    'photo': '📷 фото',
+    'video': '🎥 видео',
+    'video_note': '⭕ кружок',
+}
+
+class Broadcast:
+    """Рассылка объявления о новом контенте всем пользователям"""
+
+    def __init__(self, bot: Bot, broadcast: Dict):
+        self.bot = bot
+        self.id = broadcast['id']
+        self.content_id = broadcast['content_id']
+        self.last_user_id = broadcast['last_user_id']
+        self.sent = broadcast['sent']
+        self.failed = broadcast['failed']
+        self.blocked = broadcast['blocked']
+        self.status_message_id = broadcast['status_message_id']
+        self.last_report_at = 0.0
+
+    def announcement(self, content: Dict) -> Dict:
+        """Текст и клавиатура объявления"""
+        title = CONTENT_TITLES.get(content['type'], content['type'])
+        price_text = "бесплатно" if content['price'] == 0 else f"{content['price']} ⭐"
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(
+                text="🚀 Открыть WebApp",
+                web_app=WebAppInfo(url=WEBAPP_URL)
+            )]
+        ])
+        return {
+            'text': (
+                f"🆕 В каталоге новый контент: {title}\n\n"
+                f"📌 ID: {self.content_id}\n"
+                f"💰 Цена: {price_text}"
+            ),
+            'reply_markup': keyboard,
+        }
+
+    async def send(self, user_id: int, announcement: Dict):
+        """Отправка одному пользователю с учётом flood-ограничений"""
+        for _ in range(MAX_RETRIES + 1):
+            try:
+                await self.bot.send_message(user_id, **announcement)
+                self.sent += 1
+                return
+            except TelegramRetryAfter as e:
+                # Притормаживаем все рассылки, а не только это сообщение
+                logger.warning(f"Broadcast #{self.id}: flood limit, waiting {e.retry_after}s")
+                pause_sending(e.retry_after)
+                await throttle()
+            except TelegramForbiddenError:
+                db.mark_user_blocked(user_id)
+                self.blocked += 1
+                return
+            except TelegramAPIError as e:
+                logger.warning(f"Broadcast #{self.id}: failed to send to {user_id}: {e}")
+                self.failed += 1
+                return
+        self.failed += 1
+
+    def progress_text(self, finished: bool = False) -> str:
+        header = f"✅ Рассылка #{self.id} завершена" if finished else f"📣 Рассылка #{self.id} идёт..."
+        return (
+            f"{header}\n\n"
+            f"📌 Контент: #{self.content_id}\n"
+            f"✉️ Доставлено: {self.sent}\n"
+            f"🚫 Заблокировали бота: {self.blocked}\n"
+            f"❌ Ошибки: {self.failed}"
+        )
+
+    async def report(self, finished: bool = False):
+        """Обновление сообщения с прогрессом у админа"""
+        loop = asyncio.get_running_loop()
+        if not finished and loop.time() - self.last_report_at < REPORT_INTERVAL:
+            return
+        self.last_report_at = loop.time()
+
+        text = self.progress_text(finished)
+        try:
+            if self.status_message_id:
+                await self.bot.edit_message_text(text, chat_id=ADMIN_ID, message_id=self.status_message_id)
+            else:
+                message = await self.bot.send_message(ADMIN_ID, text)
+                self.status_message_id = message.message_id
+                db.set_broadcast_status_message(self.id, message.message_id)
+        except TelegramAPIError as e:
+            logger.warning(f"Broadcast #{self.id}: failed to report progress: {e}")
+
+    async def run(self):
+        content = db.get_content_by_id(self.content_id)
+        if not content or not content['approved']:
+            logger.warning(f"Broadcast #{self.id}: content #{self.content_id} is not available")
+            db.finish_broadcast(self.id, 'cancelled')
+            return
+
+        announcement = self.announcement(content)
+        logger.info(f"Broadcast #{self.id} started from user {self.last_user_id}")
+        await self.report()
+
+        while True:
+            user_ids = db.get_broadcast_recipients(self.last_user_id, PAGE_SIZE)
+            if not user_ids:
+                break
+
+            sends = []
+            try:
+                for user_id in user_ids:
+                    await throttle()
+                    sends.append(asyncio.create_task(self.send(user_id, announcement)))
+                await asyncio.gather(*sends)
+            except asyncio.CancelledError:
+                # Не оставляем отправки висеть после остановки рассылки
+                for send in sends:
+                    send.cancel()
+                await asyncio.gather(*sends, return_exceptions=True)
+                raise
+
+            self.last_user_id = user_ids[-1]
+            db.save_broadcast_progress(self.id, self.last_user_id, self.sent, self.failed, self.blocked)
+            await self.report()
+
+        db.finish_broadcast(self.id)
+        await self.report(finished=True)
+        logger.info(f"Broadcast #{self.id} finished: sent {self.sent}, blocked {self.blocked}, failed {self.failed}")
+
+def is_content_broadcasting(content_id: int) -> bool:
+    """Идёт ли уже рассылка об этом контенте"""
+    return any(
+        b['content_id'] == content_id and b['id'] in _tasks
+        for b in db.get_running_broadcasts()
+    )
+
+def start_broadcast(bot: Bot, broadcast_id: int) -> bool:
+    """Запустить рассылку в фоне (False - уже запущена или не найдена)"""
+    if broadcast_id in _tasks:
+        return False
+
+    broadcast = db.get_broadcast(broadcast_id)
+    if not broadcast or broadcast['status'] != 'running':
+        return False
+
+    task = asyncio.create_task(Broadcast(bot, broadcast).run())
+    _tasks[broadcast_id] = task
+    task.add_done_callback(lambda t: _on_done(bot, broadcast_id, t))
+    return True
+
+def _on_done(bot: Bot, broadcast_id: int, task: asyncio.Task):
+    _tasks.pop(broadcast_id, None)
+    if task.cancelled() or not task.exception():
+        return
+
+    error = task.exception()
+    logger.error(f"Broadcast #{broadcast_id} crashed: {error}")
+    try:
+        db.finish_broadcast(broadcast_id, 'failed')
+    except Exception as e:
+        logger.error(f"Broadcast #{broadcast_id}: failed to mark as failed: {e}")
+    asyncio.create_task(_notify_failure(bot, broadcast_id, error))
+
+async def _notify_failure(bot: Bot, broadcast_id: int, error: BaseException):
+    """Сообщить админу об аварийной остановке рассылки"""
+    try:
+        await bot.send_message(
+            ADMIN_ID,
+            f"❌ Рассылка #{broadcast_id} остановлена из-за ошибки: {error}"
+        )
+    except Exception as e:
+        logger.error(f"Broadcast #{broadcast_id}: failed to notify admin: {e}")
+
+def resume_broadcasts(bot: Bot) -> int:
+    """Продолжить рассылки, прерванные перезапуском"""
+    resumed = 0
+    for broadcast in db.get_running_broadcasts():
+        if start_broadcast(bot, broadcast['id']):
+            resumed += 1
+    return resumed
+
+async def stop_broadcasts():
+    """Остановить рассылки при выключении (прогресс уже сохранён)"""
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
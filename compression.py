@@ -0,0 +1,134 @@
+import gzip
+import json
+from typing import Dict, Optional
+from aiohttp import web
+
+# Быстрая сериализация JSON, если установлен orjson
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Brotli необязателен: без него отдаём только gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Ответы меньше этого размера не сжимаем - выигрыша нет
+MIN_COMPRESS_SIZE = 512
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Ключ, под которым обработчик кладёт в ответ готовые сжатые варианты тела
+PRECOMPRESSED_KEY = 'precompressed'
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+def dumps_json(data) -> bytes:
+    """Сериализация в компактный UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def json_response(data, status: int = 200) -> web.Response:
+    """Аналог web.json_response с быстрой сериализацией"""
+    return web.Response(
+        body=dumps_json(data),
+        status=status,
+        content_type='application/json',
+        charset='utf-8'
+    )
+
+def supported_encodings() -> tuple:
+    """Доступные кодировки в порядке предпочтения"""
+    if brotli is not None:
+        return ('br', 'gzip')
+    return ('gzip',)
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Сжать тело ответа указанной кодировкой"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Выбрать кодировку по заголовку Accept-Encoding (None - без сжатия)"""
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        token, _, params = part.partition(';')
+        token = token.strip()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+class CachedPayload:
+    """Тело ответа вместе с заранее сжатыми вариантами"""
+
+    __slots__ = ('version', 'body', 'encoded')
+
+    def __init__(self, data, version: int):
+        self.version = version
+        self.body = dumps_json(data)
+        self.encoded: Dict[str, bytes] = {}
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            for encoding in supported_encodings():
+                self.encoded[encoding] = compress(self.body, encoding)
+
+    def response(self) -> web.Response:
+        """Ответ, который compression_middleware отдаст в нужной кодировке"""
+        response = web.Response(body=self.body, content_type='application/json', charset='utf-8')
+        response[PRECOMPRESSED_KEY] = self.encoded
+        return response
+
+def _is_compressible(response: web.StreamResponse) -> bool:
+    if not isinstance(response, web.Response) or not isinstance(response.body, bytes):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    return response.content_type.startswith(COMPRESSIBLE_TYPES)
+
+@web.middleware
+async def compression_middleware(request, handler):
+    """Middleware для сжатия ответов gzip/brotli"""
+    response = await handler(request)
+
+    if not _is_compressible(response):
+        return response
+
+    response.headers.add('Vary', 'Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+
+    precompressed = response.get(PRECOMPRESSED_KEY)
+    if precompressed is not None:
+        body = precompressed.get(encoding)
+    elif len(response.body) >= MIN_COMPRESS_SIZE:
+        body = compress(response.body, encoding)
+    else:
+        body = None
+
+    if body is None:
+        return response
+
+    response.body = body
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -3,6 +3,18 @@ from datetime import datetime
 from typing import Optional, List, Dict
 from config import DATABASE_PATH
 
+# Версия каталога: увеличивается при каждом изменении опубликованного контента,
+# по ней веб-сервер сбрасывает закэшированные (и сжатые) ответы
+_content_version = 0
+
+def get_content_version() -> int:
+    """Текущая версия каталога"""
+    return _content_version
+
+def _bump_content_version():
+    global _content_version
+    _content_version += 1
+
 def init_db():
     """Инициализация базы данных"""
     conn = sqlite3.connect(DATABASE_PATH)
@@ -39,6 +51,26 @@ def init_db():
         FOREIGN KEY (content_id) REFERENCES content(id)
     )''')
     
+    # Таблица рассылок (прогресс сохраняется, чтобы продолжить после перезапуска)
+    c.execute('''CREATE TABLE IF NOT EXISTS broadcasts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_id INTEGER NOT NULL,
+        status TEXT DEFAULT 'running',
+        last_user_id INTEGER DEFAULT 0,
+        sent INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        blocked INTEGER DEFAULT 0,
+        status_message_id INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        finished_at TEXT,
+        FOREIGN KEY (content_id) REFERENCES content(id)
+    )''')
+    
+    # Отметка о пользователях, заблокировавших бота (для старых баз)
+    c.execute('PRAGMA table_info(users)')
+    if 'blocked' not in [row[1] for row in c.fetchall()]:
+        c.execute('ALTER TABLE users ADD COLUMN blocked INTEGER DEFAULT 0')
+    
     conn.commit()
     conn.close()
 
@@ -80,8 +112,31 @@ def add_content(content_type: str, file_id: str, price: int, author_id: int, app
     content_id = c.lastrowid
     conn.commit()
     conn.close()
+    if approved:
+        _bump_content_version()
     return content_id
 
+def add_content_batch(items: List[Dict], price: int, author_id: int, approved: bool = False) -> List[int]:
+    """Добавить несколько единиц контента одной транзакцией"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    c = conn.cursor()
+    content_ids = []
+    try:
+        for item in items:
+            c.execute('''INSERT INTO content (type, file_id, price, author_id, approved) 
+                         VALUES (?, ?, ?, ?, ?)''', 
+                      (item['type'], item['file_id'], price, author_id, 1 if approved else 0))
+            content_ids.append(c.lastrowid)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if approved and content_ids:
+        _bump_content_version()
+    return content_ids
+
 def approve_content(content_id: int) -> bool:
     """Одобрить контент"""
     conn = sqlite3.connect(DATABASE_PATH)
@@ -90,6 +145,8 @@ def approve_content(content_id: int) -> bool:
     affected = c.rowcount
     conn.commit()
     conn.close()
+    if affected:
+        _bump_content_version()
     return affected > 0
 
 def delete_content(content_id: int) -> bool:
@@ -100,6 +157,8 @@ def delete_content(content_id: int) -> bool:
     affected = c.rowcount
     conn.commit()
     conn.close()
+    if affected:
+        _bump_content_version()
     return affected > 0
 
 def get_approved_content(content_type: Optional[str] = None) -> List[Dict]:
@@ -144,6 +203,15 @@ def is_purchased(user_id: int, content_id: int) -> bool:
     conn.close()
     return result is not None
 
+def get_purchased_ids(user_id: int) -> set:
+    """Получить ID всех купленных пользователем единиц контента"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    c = conn.cursor()
+    c.execute('SELECT content_id FROM purchases WHERE user_id = ?', (user_id,))
+    rows = c.fetchall()
+    conn.close()
+    return {row[0] for row in rows}
+
 def get_user_purchases(user_id: int) -> List[Dict]:
     """Получить все покупки пользователя"""
     conn = sqlite3.connect(DATABASE_PATH)
@@ -154,4 +222,79 @@ def get_user_purchases(user_id: int) -> List[Dict]:
                  WHERE p.user_id = ? ORDER BY p.timestamp DESC''', (user_id,))
     rows = c.fetchall()
     conn.close()
-    return [dict(row) for row in rows]
\ No newline at end of file
+    return [dict(row) for row in rows]
+
+def mark_user_blocked(user_id: int):
+    """Отметить, что пользователь заблокировал бота"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    c = conn.cursor()
+    c.execute('UPDATE users SET blocked = 1 WHERE id = ?', (user_id,))
+    conn.commit()
+    conn.close()
+
+def get_broadcast_recipients(after_user_id: int, limit: int) -> List[int]:
+    """Получить страницу ID пользователей для рассылки (без забаненных и заблокировавших)"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    c = conn.cursor()
+    c.execute('''SELECT id FROM users 
+                 WHERE id > ? AND banned = 0 AND blocked = 0 
+                 ORDER BY id LIMIT ?''', (after_user_id, limit))
+    rows = c.fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+def create_broadcast(content_id: int) -> int:
+    """Создать рассылку"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    c = conn.cursor()
+    c.execute('INSERT INTO broadcasts (content_id) VALUES (?)', (content_id,))
+    broadcast_id = c.lastrowid
+    conn.commit()
+    conn.close()
+    return broadcast_id
+
+def get_broadcast(broadcast_id: int) -> Optional[Dict]:
+    """Получить рассылку по ID"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute('SELECT * FROM broadcasts WHERE id = ?', (broadcast_id,))
+    row = c.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def get_running_broadcasts() -> List[Dict]:
+    """Получить незавершённые рассылки"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute("SELECT * FROM broadcasts WHERE status = 'running' ORDER BY id")
+    rows = c.fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+def set_broadcast_status_message(broadcast_id: int, message_id: int):
+    """Сохранить ID сообщения с прогрессом рассылки"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    c = conn.cursor()
+    c.execute('UPDATE broadcasts SET status_message_id = ? WHERE id = ?', (message_id, broadcast_id))
+    conn.commit()
+    conn.close()
+
+def save_broadcast_progress(broadcast_id: int, last_user_id: int, sent: int, failed: int, blocked: int):
+    """Сохранить прогресс рассылки"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    c = conn.cursor()
+    c.execute('''UPDATE broadcasts SET last_user_id = ?, sent = ?, failed = ?, blocked = ? 
+                 WHERE id = ?''', (last_user_id, sent, failed, blocked, broadcast_id))
+    conn.commit()
+    conn.close()
+
+def finish_broadcast(broadcast_id: int, status: str = 'finished'):
+    """Завершить рассылку"""
+    conn = sqlite3.connect(DATABASE_PATH)
+    c = conn.cursor()
+    c.execute('UPDATE broadcasts SET status = ?, finished_at = ? WHERE id = ?',
+              (status, datetime.now().isoformat(), broadcast_id))
+    conn.commit()
+    conn.close()
\ No newline at end of file
@@ -11,7 +11,9 @@ from aiogram.types import (
 )
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+import asyncio
 import database as db
+import broadcast
 from config import ADMIN_ID, WEBAPP_URL, POLICY_URL, PAYMENT_PROVIDER_TOKEN
 import logging
 
@@ -22,9 +24,60 @@ logger = logging.getLogger(__name__)
 class ContentState(StatesGroup):
     waiting_for_price = State()
 
-# Временное хранилище для file_id при добавлении контента админом
+# Временное хранилище для file_id при добавлении контента админом:
+# партия файлов (альбом и загрузки подряд), которые получат одну цену
 temp_admin_content = {}
 
+# Файлы одного альбома (media_group_id) приходят почти одновременно:
+# столько секунд ждём следующий файл альбома, прежде чем спросить цену
+ALBUM_WINDOW = 1.0
+
+# Отдельные загрузки подряд: столько секунд ждём следующую,
+# чтобы не спрашивать цену после каждого файла
+UPLOAD_WINDOW = 3.0
+
+# Отложенные запросы цены: user_id -> задача
+price_prompts = {}
+
+def schedule_price_prompt(bot, chat_id: int, user_id: int, delay: float):
+    """Отложить запрос цены, заменив уже запланированный"""
+    pending = price_prompts.pop(user_id, None)
+    if pending:
+        pending.cancel()
+    price_prompts[user_id] = asyncio.create_task(
+        prompt_price_later(bot, chat_id, user_id, delay)
+    )
+
+async def prompt_price_later(bot, chat_id: int, user_id: int, delay: float):
+    """Спросить цену, когда админ закончил присылать файлы"""
+    await asyncio.sleep(delay)
+    price_prompts.pop(user_id, None)
+    
+    batch = temp_admin_content.get(user_id)
+    if not batch or not batch['items']:
+        return
+    
+    # Окно партии закрыто: следующие файлы (кроме этого же альбома) начнут новую
+    batch['prompted'] = True
+    items = batch['items']
+    
+    if len(items) == 1:
+        header = "📝 Укажи цену для этого товара (в звёздах Telegram):\n"
+    else:
+        header = f"📝 Укажи цену для {len(items)} товаров — она будет одна для всех (в звёздах Telegram):\n"
+    
+    try:
+        await bot.send_message(
+            chat_id,
+            header +
+            "• 0 — бесплатно\n"
+            "• 1 и выше — платно\n\n"
+            "Например: 5"
+        )
+        logger.info(f"Admin uploaded {len(items)} item(s), waiting for price")
+    except Exception as e:
+        logger.error(f"Error sending price prompt: {e}")
+
 @router.message(CommandStart())
 async def cmd_start(message: Message):
     """Обработка команды /start"""
@@ -114,13 +167,55 @@ async def cmd_approve(message: Message):
         content_id = int(parts[1])
         
         if db.approve_content(content_id):
-            await message.answer(f"✅ Контент #{content_id} одобрен и опубликован.")
+            await message.answer(
+                f"✅ Контент #{content_id} одобрен и опубликован.\n"
+                f"📣 Сообщить пользователям: /broadcast {content_id}"
+            )
             logger.info(f"Admin approved content #{content_id}")
         else:
             await message.answer(f"❌ Контент #{content_id} не найден.")
     except (IndexError, ValueError):
         await message.answer("❌ Неверный формат. Использование: /approve <id>")
 
+@router.message(Command("broadcast"))
+async def cmd_broadcast(message: Message):
+    """Рассылка объявления о новом контенте (только админ)"""
+    if message.from_user.id != ADMIN_ID:
+        await message.answer("❌ У вас нет прав для этой команды.")
+        return
+    
+    try:
+        parts = message.text.split()
+        if len(parts) < 2:
+            await message.answer("Использование: /broadcast <id>")
+            return
+            
+        content_id = int(parts[1])
+        
+        content = db.get_content_by_id(content_id)
+        if not content:
+            await message.answer(f"❌ Контент #{content_id} не найден.")
+            return
+        if not content['approved']:
+            await message.answer(f"❌ Контент #{content_id} ещё не одобрен. Используй: /approve {content_id}")
+            return
+        
+        if broadcast.is_content_broadcasting(content_id):
+            await message.answer(f"ℹ️ Рассылка о контенте #{content_id} уже идёт.")
+            return
+        
+        broadcast_id = db.create_broadcast(content_id)
+        if not broadcast.start_broadcast(message.bot, broadcast_id):
+            db.finish_broadcast(broadcast_id, 'failed')
+            await message.answer(f"❌ Не удалось запустить рассылку #{broadcast_id}.")
+            logger.error(f"Failed to start broadcast #{broadcast_id} for content #{content_id}")
+            return
+        
+        await message.answer(f"📣 Рассылка #{broadcast_id} о контенте #{content_id} запущена.")
+        logger.info(f"Admin started broadcast #{broadcast_id} for content #{content_id}")
+    except (IndexError, ValueError):
+        await message.answer("❌ Неверный формат. Использование: /broadcast <id>")
+
 @router.message(F.photo | F.video | F.video_note)
 async def handle_media(message: Message, state: FSMContext):
     """Обработка фото, видео и кружков"""
@@ -143,20 +238,39 @@ async def handle_media(message: Message, state: FSMContext):
     else:
         return
     
-    # Если отправил админ
+    # Если отправил админ: копим партию - файлы альбома (media_group_id)
+    # и загрузки подряд, пока не спрошена цена; цену спрашиваем один раз
     if user.id == ADMIN_ID:
-        temp_admin_content[user.id] = {
+        batch = temp_admin_content.get(user.id)
+        same_album = (
+            batch is not None
+            and message.media_group_id is not None
+            and message.media_group_id == batch['media_group_id']
+        )
+        discarded = 0
+        if batch is None or (batch['prompted'] and not same_album):
+            if batch:
+                discarded = len(batch['items'])
+            batch = {'items': [], 'media_group_id': None, 'prompted': False}
+            temp_admin_content[user.id] = batch
+        
+        if message.media_group_id is not None:
+            batch['media_group_id'] = message.media_group_id
+        batch['items'].append({
             'type': content_type,
             'file_id': file_id
-        }
+        })
+        
+        if discarded:
+            await message.answer(
+                f"⚠️ Предыдущие файлы без цены ({discarded} шт.) отменены, "
+                f"начинаю новую партию."
+            )
+            logger.info(f"Admin discarded unpriced batch of {discarded} item(s)")
         await state.set_state(ContentState.waiting_for_price)
-        await message.answer(
-            "📝 Укажи цену для этого товара (в звёздах Telegram):\n"
-            "• 0 — бесплатно\n"
-            "• 1 и выше — платно\n\n"
-            "Например: 5"
-        )
-        logger.info(f"Admin uploading content, waiting for price")
+        
+        delay = ALBUM_WINDOW if message.media_group_id else UPLOAD_WINDOW
+        schedule_price_prompt(message.bot, message.chat.id, user.id, delay)
     else:
         # Обычный пользователь предлагает контент
         await message.answer("✅ Благодарим за ваше предложение! Оно будет отправлено на модерацию.")
@@ -204,32 +318,41 @@ async def process_price(message: Message, state: FSMContext):
             await message.answer("❌ Цена не может быть отрицательной. Попробуй ещё раз:")
             return
         
-        content_data = temp_admin_content.get(message.from_user.id)
-        if not content_data:
+        # Забираем партию до первого await: файлы, пришедшие пока мы отвечаем,
+        # начнут новую партию, а не потеряются
+        batch = temp_admin_content.pop(message.from_user.id, None)
+        if not batch or not batch['items']:
             await message.answer("❌ Ошибка: контент не найден. Отправь медиа заново.")
             await state.clear()
             return
         
-        content_id = db.add_content(
-            content_data['type'],
-            content_data['file_id'],
-            price,
-            ADMIN_ID,
-            approved=True
-        )
+        pending = price_prompts.pop(message.from_user.id, None)
+        if pending:
+            pending.cancel()
+        
+        try:
+            content_ids = db.add_content_batch(batch['items'], price, ADMIN_ID, approved=True)
+        except Exception:
+            temp_admin_content.setdefault(message.from_user.id, batch)
+            raise
         
         price_text = "бесплатно" if price == 0 else f"{price} ⭐"
+        if len(content_ids) == 1:
+            ids_text = f"📌 ID: {content_ids[0]}\n"
+        else:
+            ids_text = f"📌 Добавлено: {len(content_ids)} шт. (ID {content_ids[0]}–{content_ids[-1]})\n"
         await message.answer(
             f"✅ Контент успешно добавлен!\n\n"
-            f"📌 ID: {content_id}\n"
+            f"{ids_text}"
             f"💰 Цена: {price_text}\n"
             f"📱 Теперь доступен в WebApp"
         )
         
-        logger.info(f"Admin added content #{content_id} with price {price}")
+        logger.info(f"Admin added content {content_ids} with price {price}")
         
-        del temp_admin_content[message.from_user.id]
-        await state.clear()
+        # Если за это время пришли новые файлы, их партия ждёт своей цены
+        if message.from_user.id not in temp_admin_content:
+            await state.clear()
         
     except ValueError:
         await message.answer("❌ Введи корректное число. Например: 5")
@@ -287,7 +410,8 @@ async def unknown_message(message: Message):
             "/start - Запустить бота\n"
             "/delete <id> - Удалить контент\n"
             "/ban @username - Забанить пользователя\n"
-            "/approve <id> - Одобрить контент\n\n"
+            "/approve <id> - Одобрить контент\n"
+            "/broadcast <id> - Разослать объявление о контенте\n\n"
             "Отправь фото/видео для добавления контента"
         )
     else:
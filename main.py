@@ -9,6 +9,8 @@ from aiohttp import web
 import os
 
 import database as db
+import broadcast
+from compression import CachedPayload, compression_middleware, json_response
 from handlers import router
 from config import BOT_TOKEN, PAYMENT_PROVIDER_TOKEN, USE_REAL_PAYMENTS
 
@@ -42,6 +44,21 @@ async def health_check(request):
         'bot_id': (await bot.get_me()).id
     })
 
+# Кэш каталога по типу контента: JSON и его сжатые варианты
+catalog_cache = {}
+
+# Кэшируем только известные типы, чтобы произвольный ?type= не засорял память
+CACHEABLE_TYPES = (None, 'photo', 'video', 'video_note')
+
+def get_cached_catalog(content_type):
+    """Каталог из кэша, пересобирается при изменении контента"""
+    version = db.get_content_version()
+    cached = catalog_cache.get(content_type)
+    if cached is None or cached.version != version:
+        cached = CachedPayload(db.get_approved_content(content_type), version)
+        catalog_cache[content_type] = cached
+    return cached
+
 # WebApp API эндпоинты
 async def get_content(request):
     """API для получения контента в WebApp"""
@@ -49,17 +66,23 @@ async def get_content(request):
         content_type = request.query.get('type')
         user_id = request.query.get('user_id')
         
-        content_list = db.get_approved_content(content_type)
-        
+        uid = None
         if user_id:
             try:
                 uid = int(user_id)
-                for item in content_list:
-                    item['purchased'] = db.is_purchased(uid, item['id'])
             except ValueError:
                 pass
         
-        return web.json_response(content_list)
+        if uid is None and content_type in CACHEABLE_TYPES:
+            return get_cached_catalog(content_type).response()
+        
+        content_list = db.get_approved_content(content_type)
+        if uid is not None:
+            purchased_ids = db.get_purchased_ids(uid)
+            for item in content_list:
+                item['purchased'] = item['id'] in purchased_ids
+        
+        return json_response(content_list)
     except Exception as e:
         logger.error(f"Error in get_content: {e}")
         return web.json_response({'error': str(e)}, status=500)
@@ -75,7 +98,7 @@ async def get_purchases(request):
         try:
             uid = int(user_id)
             purchases = db.get_user_purchases(uid)
-            return web.json_response(purchases)
+            return json_response(purchases)
         except ValueError:
             return web.json_response({'error': 'invalid user_id'}, status=400)
     except Exception as e:
@@ -149,6 +172,7 @@ async def set_bot_commands():
         BotCommand(command="delete", description="[Админ] Удалить контент"),
         BotCommand(command="ban", description="[Админ] Забанить пользователя"),
         BotCommand(command="approve", description="[Админ] Одобрить контент"),
+        BotCommand(command="broadcast", description="[Админ] Разослать объявление о контенте"),
     ]
     await bot.set_my_commands(commands)
     logger.info("✅ Bot commands set")
@@ -182,6 +206,11 @@ async def on_startup(app):
     else:
         logger.info(f"ℹ️ Webhook already set to: {WEBHOOK_URL}")
     
+    # Продолжаем рассылки, прерванные перезапуском
+    resumed = broadcast.resume_broadcasts(bot)
+    if resumed:
+        logger.info(f"📣 Resumed {resumed} broadcast(s)")
+    
     # Показываем режим работы
     if USE_REAL_PAYMENTS:
         logger.info("💳 Payment mode: REAL PAYMENTS (Telegram Stars)")
@@ -194,13 +223,14 @@ async def on_startup(app):
 async def on_shutdown(app):
     """Действия при остановке"""
     logger.info("⏹️ Shutting down bot...")
+    await broadcast.stop_broadcasts()
     await bot.delete_webhook(drop_pending_updates=True)
     await bot.session.close()
 
 def main():
     """Главная функция"""
     # Создаём приложение
-    app = web.Application(middlewares=[cors_middleware])
+    app = web.Application(middlewares=[cors_middleware, compression_middleware])
     
     # API роуты (важен порядок - сначала конкретные, потом общие)
     app.router.add_get('/api/content', get_content)